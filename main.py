@@ -1,7 +1,8 @@
+import operator
 import os
-import re
+import sys
 from dataclasses import dataclass, field
-from typing import Optional, Self
+from typing import Iterator, Optional, Self, TextIO
 import argparse
 import logging
 
@@ -20,6 +21,25 @@ logging.basicConfig(
 )
 
 
+def _split_name(name: str) -> Optional[tuple[str, int, str]]:
+    # Same result as matching r"(.+) \((\d{4})\)(.*)": take the last " ("
+    # that is followed by a four digit year and a closing parenthesis
+    end = len(name)
+    while (i := name.rfind(" (", 0, end)) > 0:
+        year = name[i + 2 : i + 6]
+        if len(year) == 4 and year.isdecimal() and name[i + 6 : i + 7] == ")":
+            return name[:i], int(year), name[i + 7 :]
+        end = i + 1
+    return None
+
+
+def _split_extension(filename: str) -> tuple[str, str]:
+    base, dot, ext = filename.rpartition(".")
+    if not dot:
+        return filename, ""
+    return base, dot + ext
+
+
 class bcolors:
     HEADER = "\033[95m"
     OKBLUE = "\033[94m"
@@ -31,7 +51,12 @@ class bcolors:
     UNDERLINE = "\033[4m"
 
 
-@dataclass
+_STRONG_PRE = bcolors.BOLD + bcolors.OKGREEN
+_BLUE = bcolors.OKBLUE
+_ENDC = bcolors.ENDC
+
+
+@dataclass(slots=True)
 class Movie:
     title: str
     year: int
@@ -40,32 +65,26 @@ class Movie:
     imdb: Optional[str] = None
     tmdb: Optional[str] = None
 
+    _META_ATTRS = frozenset({"imdb", "tmdb", "edition"})
+
     @classmethod
     def parse(cls, name: str, extension: Optional[str] = None) -> Self:
-        regexp = r"(.+) \((\d{4})\)(.*)"
-        match = re.match(regexp, name)
-        if match is None:
+        parts = _split_name(name)
+        if parts is None:
             raise ValueError(f"Invalid name: {name!r}")
-        title, year, metadata = match.groups()
-        movie = cls(title=title, year=int(year), extension=extension)
+        title, year, metadata = parts
+        movie = cls(title=title, year=year, extension=extension)
 
         # Scuffed but working
         # TODO: Handle more pt/cd/disc numbers (cd1, cd2, etc.)
         if metadata:
-            print("before", repr(metadata))
             metadata = metadata[2:-1]  # .lstrip(" {").rstrip("}")
-            print("after", repr(metadata))
             metadata = metadata.split("} {")
             for item in metadata:
                 key, value = item.split("-", 1)
-                if key == "imdb":
-                    movie.imdb = value
-                elif key == "tmdb":
-                    movie.tmdb = value
-                elif key == "edition":
-                    movie.edition = value
-                else:
+                if key not in cls._META_ATTRS:
                     raise ValueError(f"Invalid metadata key: {key!r}")
+                setattr(movie, key, value)
         return movie
 
     @classmethod
@@ -74,8 +93,7 @@ class Movie:
 
     @classmethod
     def parse_file(cls, filename: str) -> Self:
-        filename, file_extension = os.path.splitext(filename)
-        return cls.parse(filename, file_extension)
+        return cls.parse(*_split_extension(filename))
 
     @property
     def full_title(self) -> str:
@@ -96,24 +114,39 @@ class Movie:
         return string
 
 
-@dataclass
+@dataclass(slots=True)
 class Collection:
     collection: list[Movie] = field(default_factory=list)
 
     @classmethod
-    def parse_path(cls, path: str) -> Self:
-        _, dirs, files = next(os.walk(path))
+    def parse_path(cls, path: str, sort_key: str = "title") -> Self:
+        names, extensions = cls._scan(path)
         c = cls()
-        for dirname in dirs:
-            movie = Movie.parse_directory(dirname)
-            c.add_movie(movie)
-        for filename in files:
-            if filename in IGNORED_FILES:
-                continue
-            movie = Movie.parse_file(filename)
+        for movie in map(Movie.parse, names, extensions):
             c.add_movie(movie)
+        c.sort(sort_key)
         return c
 
+    @staticmethod
+    def _scan(path: str) -> tuple[list[str], list[Optional[str]]]:
+        # scandir reuses the entry type reported by the OS, so only symlinks
+        # need an extra stat() to tell directories from files (os.walk also
+        # follows them). Directories get no extension, which is all
+        # Movie.parse_directory would do.
+        names: list[str] = []
+        extensions: list[Optional[str]] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name in IGNORED_FILES:
+                    continue
+                if entry.is_dir():
+                    name, extension = entry.name, None
+                else:
+                    name, extension = _split_extension(entry.name)
+                names.append(name)
+                extensions.append(extension)
+        return names, extensions
+
     def add_movie(self, movie: Movie) -> None:
         self.collection.append(movie)
         logger.debug("Added %r", movie.full_title)
@@ -132,27 +165,29 @@ class Collection:
             )
             key = "title"
 
-        self.collection.sort(key=lambda movie: getattr(movie, key))
+        self.collection.sort(key=operator.attrgetter(key))
 
-    def _get_width(self, attr: str) -> int:
-        width = len(attr)
+    def _compute_widths(self) -> tuple[int, int, int]:
+        title_width, imdb_width, tmdb_width = len("Title"), len("IMDb"), len("TMDB")
         for movie in self.collection:
-            if getattr(movie, attr) is not None:
-                width = max(width, len(getattr(movie, attr)))
-        return width
+            title_width = max(title_width, len(movie.full_title))
+            if movie.imdb is not None:
+                imdb_width = max(imdb_width, len(movie.imdb))
+            if movie.tmdb is not None:
+                tmdb_width = max(tmdb_width, len(movie.tmdb))
+        return title_width, imdb_width, tmdb_width
 
     @staticmethod
     def _strong(string: str) -> str:
-        return f"{bcolors.BOLD}{bcolors.OKGREEN}{string}{bcolors.ENDC}"
+        return f"{_STRONG_PRE}{string}{_ENDC}"
 
-    def _table(self) -> str:
-        title_width = self._get_width("full_title")
-        imdb_width = self._get_width("imdb")
-        tmdb_width = self._get_width("tmdb")
+    def _iter_table_lines(self) -> Iterator[str]:
+        title_width, imdb_width, tmdb_width = self._compute_widths()
 
         title_line = "─" * title_width
         imdb_line = "─" * imdb_width
         tmdb_line = "─" * tmdb_width
+        spaces = " " * max(title_width, imdb_width, tmdb_width)
 
         index_head = self._strong("   #")
         title_head = self._strong("Title".ljust(title_width))
@@ -160,25 +195,33 @@ class Collection:
         imdb_head = self._strong("IMDb".center(imdb_width))
         tmdb_head = self._strong("TMDB".center(tmdb_width))
 
-        string = f"╭──────┬─{title_line}─┬──────┬─{imdb_line}─┬─{tmdb_line}─╮\n"
-        string += f"│ {index_head} │ {title_head} │ {year_head} │ {imdb_head} │ {tmdb_head} │\n"
-        string += f"├──────┼─{title_line}─┼──────┼─{imdb_line}─┼─{tmdb_line}─┤\n"
+        yield f"╭──────┬─{title_line}─┬──────┬─{imdb_line}─┬─{tmdb_line}─╮"
+        yield f"│ {index_head} │ {title_head} │ {year_head} │ {imdb_head} │ {tmdb_head} │"
+        yield f"├──────┼─{title_line}─┼──────┼─{imdb_line}─┼─{tmdb_line}─┤"
 
-        for i, movie in enumerate(self.collection):
-            index = self._strong(str(i + 1).rjust(4))
-            title = movie.full_title.ljust(title_width)
+        strong = self._strong
+        for i, movie in enumerate(self.collection, 1):
+            index = strong(str(i).rjust(4))
+            title = movie.full_title
+            title += spaces[: title_width - len(title)]
             if movie.extension is not None:
-                title = f"{bcolors.OKBLUE}{title}{bcolors.ENDC}"
+                title = f"{_BLUE}{title}{_ENDC}"
             year = movie.year
-            imdb = (movie.imdb or " -").ljust(imdb_width)
-            tmdb = (movie.tmdb or " -").ljust(tmdb_width)
-            string += f"│ {index} │ {title} │ {year} │ {imdb} │ {tmdb} │\n"
+            imdb = movie.imdb or " -"
+            imdb += spaces[: imdb_width - len(imdb)]
+            tmdb = movie.tmdb or " -"
+            tmdb += spaces[: tmdb_width - len(tmdb)]
+            yield f"│ {index} │ {title} │ {year} │ {imdb} │ {tmdb} │"
 
-        string += f"╰──────┴─{title_line}─┴──────┴─{imdb_line}─┴─{tmdb_line}─╯"
-        return string
+        yield f"╰──────┴─{title_line}─┴──────┴─{imdb_line}─┴─{tmdb_line}─╯"
+
+    def write_to(self, stream: Optional[TextIO] = None) -> None:
+        if stream is None:
+            stream = sys.stdout
+        stream.writelines(f"{line}\n" for line in self._iter_table_lines())
 
     def __str__(self) -> str:
-        return self._table()
+        return "\n".join(self._iter_table_lines())
 
 
 if __name__ == "__main__":
@@ -187,7 +230,6 @@ if __name__ == "__main__":
     parser.add_argument("--sort", default="title")
     args = parser.parse_args()
 
-    collection = Collection.parse_path(args.path)
-    collection.sort(args.sort)
+    collection = Collection.parse_path(args.path, args.sort)
 
-    print(collection)
+    collection.write_to()